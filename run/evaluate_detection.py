@@ -5,9 +5,12 @@ German Cancer Research Center (DKFZ), Heidelberg, Germany, and contributors
 SPDX-License-Identifier: Apache-2.0
 """
 
-from utilities.data_io import write_results, check_valid_input, read_segmentation_input, merge_seg_data_and_gt
+from utilities.data_io import write_results, check_valid_input, read_segmentation_input, merge_seg_data_and_gt, \
+    validate_volume_table
 from evaluation.detection_eval import perform_evaluation
 import argparse
+import json
+import os
 
 
 def parse_arguments():
@@ -20,31 +23,125 @@ def parse_arguments():
     parser.add_argument('--ground-truth-csv', '-seg_csv_gt', type=str,
                         help='Path to a csv file containing ground-truth segmentation volumes (in milliliters) '
                              'and image-level labels for AD- and non-AD cases.')
+    parser.add_argument('--labelfile', type=str,
+                        help='Path to a json file of label-to-structure mappings. If given, the columns of the '
+                             'volume tables are validated against the structures in the label file.')
+    parser.add_argument('--volume-ranges', type=str,
+                        help='Path to a json file mapping structures to plausible volume ranges [min, max] '
+                             '(in milliliters). Either bound may be null.')
+    parser.add_argument('--quarantine', action='store_true',
+                        help='Exclude invalid rows from the evaluation instead of aborting.')
+    parser.add_argument('--max-report-rows', type=non_negative_int, default=10,
+                        help='Maximum number of invalid rows listed in the validation report.')
     return parser.parse_args()
 
 
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"Expected a non-negative integer, got: {value}.")
+    return number
+
+
+def read_json(file: str, description: str):
+    try:
+        with open(file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        raise RuntimeError(f"Could not read {description} from file: {file}.") from e
+
+
+def read_volume_ranges(range_file: str) -> dict:
+    ranges = read_json(range_file, 'volume ranges')
+    if not isinstance(ranges, dict) or not all(isinstance(bounds, list) and len(bounds) == 2
+                                               for bounds in ranges.values()):
+        raise ValueError(f"Volume ranges in file {range_file} must map structures to [min, max].")
+
+    for structure, (lower, upper) in ranges.items():
+        if not all(bound is None or (isinstance(bound, (int, float)) and not isinstance(bound, bool))
+                   for bound in (lower, upper)):
+            raise ValueError(f"Volume ranges in file {range_file} must be numbers or null. "
+                             f"Invalid range for structure {structure}: {[lower, upper]}.")
+        if lower is not None and upper is not None and lower > upper:
+            raise ValueError(f"Volume ranges in file {range_file} must have min <= max. "
+                             f"Invalid range for structure {structure}: {[lower, upper]}.")
+    return {structure: tuple(bounds) for structure, bounds in ranges.items()}
+
+
+def check_volume_range_structures(volume_ranges: dict, seg_data, range_file: str, seg_csv: str):
+    unknown_structures = set(volume_ranges) - (set(seg_data.columns) - {'is_AD'})
+    if unknown_structures:
+        raise ValueError(f"Volume ranges in file {range_file} given for structures not in file {seg_csv}: "
+                         f"{unknown_structures}.")
+
+
+def validate_input(seg_data, seg_csv: str, label_dict: dict, volume_ranges: dict, max_report_rows: int,
+                   quarantine: bool, check_basenames: bool):
+    try:
+        seg_data, report = validate_volume_table(seg_data, label_dict, volume_ranges, max_report_rows, quarantine,
+                                                 check_basenames)
+    except ValueError as e:
+        raise ValueError(f"Invalid volume measurements in file: {seg_csv}.") from e
+
+    if report['quarantined']:
+        print(f"Quarantined n={report['n_offending']} of n={report['n_rows']} rows from file: {seg_csv}. "
+              f"Issues: {report['issues']}. First quarantined rows: {report['offending_rows']}.")
+    return seg_data
+
+
+def restrict_to_common_cases(seg_data, seg_data_gt):
+    seg_basenames = seg_data.index.map(os.path.basename)
+    gt_basenames = seg_data_gt.index.map(os.path.basename)
+    common = set(seg_basenames) & set(gt_basenames)
+    seg_common = seg_basenames.isin(common)
+    gt_common = gt_basenames.isin(common)
+
+    if not seg_common.all() or not gt_common.all():
+        print(f"Dropped n={len(seg_common) - seg_common.sum()} rows from the segmentation input and "
+              f"n={len(gt_common) - gt_common.sum()} rows from the ground truth input without a matching case.")
+    return seg_data[seg_common].copy(), seg_data_gt[gt_common].copy()
+
+
+def check_input(seg_data, seg_csv: str, description: str, quarantine: bool):
+    try:
+        check_valid_input(seg_data)
+    except ValueError as e:
+        hint = " after quarantining invalid rows" if quarantine else ""
+        raise ValueError(f"Something is wrong with the {description} from file {seg_csv}. "
+                         f"Input must have entries for both classes (AD and non-AD){hint} "
+                         f"and must not contain NANs.") from e
+
+
 def main():
     args = parse_arguments()
     seg_csv = args.segmentation_csv
     eval_output = args.evaluation_output
     seg_csv_gt = args.ground_truth_csv
+    quarantine = args.quarantine
+    max_report_rows = args.max_report_rows
+
+    label_dict = read_json(args.labelfile, 'label information') if args.labelfile is not None else None
+    volume_ranges = read_volume_ranges(args.volume_ranges) if args.volume_ranges is not None else None
+    # Cases are matched to the ground truth by basename, which therefore has to be unique.
+    check_basenames = seg_csv_gt is not None
 
     seg_data = read_segmentation_input(seg_csv)
-    try:
-        check_valid_input(seg_data)
-    except ValueError as e:
-        raise ValueError(f"Something is wrong with the segmentation input from file {seg_csv}. "
-                         f"Input must have entries for both classes (AD and non-AD) and must not contain NANs.") \
-            from e
+    if volume_ranges is not None:
+        check_volume_range_structures(volume_ranges, seg_data, args.volume_ranges, seg_csv)
+    seg_data = validate_input(seg_data, seg_csv, label_dict, volume_ranges, max_report_rows, quarantine,
+                              check_basenames)
+    check_input(seg_data, seg_csv, 'segmentation input', quarantine)
 
     if seg_csv_gt is not None:
         seg_data_gt = read_segmentation_input(seg_csv_gt)
-        try:
-            check_valid_input(seg_data_gt)
-        except ValueError as e:
-            raise ValueError(f"Something is wrong with the ground truth segmentation input from file {seg_csv_gt}. "
-                             f"Input must have entries for both classes (AD and non-AD) and must not contain NANs. ") \
-                from e
+        if volume_ranges is not None:
+            check_volume_range_structures(volume_ranges, seg_data_gt, args.volume_ranges, seg_csv_gt)
+        seg_data_gt = validate_input(seg_data_gt, seg_csv_gt, label_dict, volume_ranges, max_report_rows,
+                                     quarantine, check_basenames)
+        if quarantine:
+            seg_data, seg_data_gt = restrict_to_common_cases(seg_data, seg_data_gt)
+            check_input(seg_data, seg_csv, 'segmentation input', quarantine)
+        check_input(seg_data_gt, seg_csv_gt, 'ground truth segmentation input', quarantine)
 
         try:
             merge_seg_data_and_gt(seg_data, seg_data_gt)
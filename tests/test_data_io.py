@@ -0,0 +1,151 @@
+"""
+SPDX-FileCopyrightText: Copyright 2024 Division of Medical Image Computing,
+German Cancer Research Center (DKFZ), Heidelberg, Germany, and contributors
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from utilities.data_io import validate_volume_table, segdata_check_nan
+
+
+class TestValidateVolumeTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.label_dict = {"1": "false_lumen_ascending", "2": "false_lumen_descending", "4": "membrane"}
+        self.seg_data = pd.DataFrame({
+            'false_lumen_ascending': [10.0, 0.0, 5.0, 2.0, 7.0],
+            'false_lumen_descending': [20.0, 0.0, 1.0, 3.0, 4.0],
+            'membrane': [3.0, 0.0, 1.0, 0.5, 2.0],
+            'is_AD': [True, False, True, False, True],
+        }, index=['diseased/001.nii.gz', 'healthy/002.nii.gz', 'diseased/003.nii.gz', 'healthy/004.nii.gz',
+                  'diseased/005.nii.gz'])
+
+    def test_valid_table(self):
+        seg_data, report = validate_volume_table(self.seg_data, self.label_dict)
+
+        self.assertEqual(len(seg_data), 5)
+        self.assertEqual(report['n_offending'], 0)
+        self.assertFalse(report['quarantined'])
+
+    def test_missing_column(self):
+        label_dict = {**self.label_dict, "3": "hemopericardium"}
+
+        with self.assertRaises(ValueError):
+            validate_volume_table(self.seg_data, label_dict, quarantine=True)
+
+    def test_missing_evaluation_column(self):
+        with self.assertRaises(ValueError):
+            validate_volume_table(self.seg_data.drop(columns='membrane'), quarantine=True)
+
+    def test_invalid_rows_raise(self):
+        self.seg_data.loc['healthy/002.nii.gz', 'false_lumen_ascending'] = -1.0
+
+        with self.assertRaises(ValueError):
+            validate_volume_table(self.seg_data, self.label_dict)
+
+    def test_negative_max_report_rows(self):
+        with self.assertRaises(ValueError):
+            validate_volume_table(self.seg_data, max_report_rows=-1)
+
+    def test_quarantine(self):
+        self.seg_data.loc['healthy/002.nii.gz', 'false_lumen_ascending'] = -1.0
+        self.seg_data.loc['diseased/003.nii.gz', 'false_lumen_descending'] = np.nan
+        self.seg_data.loc['healthy/004.nii.gz', 'false_lumen_descending'] = 5000.0
+        self.seg_data.index = ['diseased/001.nii.gz', 'healthy/002.nii.gz', 'diseased/003.nii.gz',
+                               'healthy/001.nii.gz', 'diseased/005.nii.gz']
+        volume_ranges = {'false_lumen_descending': (0, 1000)}
+
+        seg_data, report = validate_volume_table(self.seg_data, self.label_dict, volume_ranges,
+                                                 max_report_rows=2, quarantine=True, check_basenames=True)
+
+        self.assertEqual(report['n_offending'], 4)
+        self.assertEqual(len(report['offending_rows']), 2)
+        self.assertEqual(report['issues'], {'missing_values': 1, 'negative_volume': 1,
+                                            'implausible_volume': 1, 'duplicate_basename': 2})
+        pd.testing.assert_frame_equal(seg_data, self.seg_data.loc[['diseased/005.nii.gz']])
+
+    def test_duplicate_cases(self):
+        self.seg_data.index = ['diseased/001.nii.gz', 'healthy/002.nii.gz', 'diseased/003.nii.gz',
+                               'healthy/001.nii.gz', 'diseased/001.nii.gz']
+
+        seg_data, report = validate_volume_table(self.seg_data, quarantine=True)
+
+        self.assertEqual(report['issues'], {'duplicate_case': 2})
+        self.assertEqual(list(seg_data.index), ['healthy/002.nii.gz', 'diseased/003.nii.gz', 'healthy/001.nii.gz'])
+
+    def test_invalid_dtype(self):
+        self.seg_data['membrane'] = ['3.0', 'abc', '1.0', '0.5', '2.0']
+
+        seg_data, report = validate_volume_table(self.seg_data, self.label_dict, quarantine=True)
+
+        self.assertEqual(report['non_numeric_columns'], ['membrane'])
+        self.assertEqual(report['issues'], {'invalid_dtype': 1})
+        self.assertTrue(pd.api.types.is_float_dtype(seg_data['membrane'].dtype))
+        self.assertEqual(list(seg_data.index), ['diseased/001.nii.gz', 'diseased/003.nii.gz', 'healthy/004.nii.gz',
+                                                'diseased/005.nii.gz'])
+        self.assertEqual(seg_data['membrane'].tolist(), [3.0, 1.0, 0.5, 2.0])
+
+    def test_bool_column(self):
+        self.seg_data['membrane'] = self.seg_data['membrane'] > 1
+
+        with self.assertRaises(ValueError):
+            validate_volume_table(self.seg_data)
+
+        seg_data, report = validate_volume_table(self.seg_data, quarantine=True)
+
+        self.assertEqual(report['non_numeric_columns'], ['membrane'])
+        self.assertEqual(report['issues'], {'invalid_dtype': 5})
+        self.assertEqual(len(seg_data), 0)
+
+    def test_non_finite_volume(self):
+        self.seg_data.loc['diseased/001.nii.gz', 'false_lumen_ascending'] = np.inf
+        self.seg_data.loc['healthy/002.nii.gz', 'membrane'] = -np.inf
+
+        seg_data, report = validate_volume_table(self.seg_data, quarantine=True)
+
+        self.assertEqual(report['issues'], {'non_finite_volume': 2, 'negative_volume': 1})
+        self.assertEqual(list(seg_data.index), ['diseased/003.nii.gz', 'healthy/004.nii.gz', 'diseased/005.nii.gz'])
+
+    @unittest.skipUnless(os.environ.get('ADETECT_PERFORMANCE_TESTS'),
+                         "Set ADETECT_PERFORMANCE_TESTS to run runtime checks.")
+    def test_runtime_large_table(self):
+        n = 1_000_000
+        rng = np.random.default_rng(0)
+        columns = ['false_lumen_ascending', 'false_lumen_descending', 'membrane', 'hemopericardium']
+        seg_data = pd.DataFrame(rng.random((n, len(columns))) * 100, columns=columns,
+                                index=[f"{'diseased' if i % 2 else 'healthy'}/{i}.nii.gz" for i in range(n)])
+        seg_data['is_AD'] = rng.random(n) > 0.5
+
+        for check_basenames in (False, True):
+            with self.subTest(check_basenames=check_basenames):
+                start = time.perf_counter()
+                validate_volume_table(seg_data, volume_ranges={column: (0, 1000) for column in columns},
+                                      check_basenames=check_basenames)
+
+                self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class TestSegdataCheckNan(unittest.TestCase):
+
+    def test_report_capped(self):
+        seg_data = pd.DataFrame({'membrane': [np.nan, 1.0, np.nan, np.nan], 'is_AD': [True, False, True, np.nan]},
+                                index=['a', 'b', 'c', 'd'])
+
+        with self.assertRaises(ValueError) as context:
+            segdata_check_nan(seg_data, max_report_rows=2)
+
+        self.assertIn("(n=4)", str(context.exception))
+        self.assertIn("[('a', 'membrane'), ('c', 'membrane')]", str(context.exception))
+
+    def test_negative_max_report_rows(self):
+        with self.assertRaises(ValueError):
+            segdata_check_nan(pd.DataFrame({'membrane': [1.0]}), max_report_rows=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
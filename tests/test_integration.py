@@ -5,9 +5,13 @@ German Cancer Research Center (DKFZ), Heidelberg, Germany, and contributors
 SPDX-License-Identifier: Apache-2.0
 """
 
+import io
+import json
 import os
+import tempfile
 import unittest
 from unittest.mock import patch
+import pandas as pd
 from run import evaluate_detection, prepare_evaluation_data
 
 
@@ -107,5 +111,107 @@ class IntegrationTestPrepareEvaluationData(unittest.TestCase):
         self.assertEqual(ref_volumes, output_volumes)
 
 
+class IntegrationTestInputValidation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        data_base = "../data/reference_data"
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+        self.volumes = pd.read_csv(f"{data_base}/volumes.csv", index_col=0)
+        self.volumes_gt = pd.read_csv(f"{data_base}/volumes_gt.csv", index_col=0)
+        self.labelfile = f"{data_base}/labelfile.json"
+        self.volume_data = os.path.join(self.tmpdir.name, "volumes.csv")
+        self.volume_data_gt = os.path.join(self.tmpdir.name, "volumes_gt.csv")
+        self.volume_ranges = os.path.join(self.tmpdir.name, "volume_ranges.json")
+        self.outfile = os.path.join(self.tmpdir.name, "results.json")
+        self.argv = ['script_name',
+                     '--segmentation-csv', self.volume_data,
+                     '--evaluation-output', self.outfile]
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def run_evaluation(self, argv: list) -> str:
+        with patch('sys.argv', argv), patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            evaluate_detection.main()
+        return stdout.getvalue()
+
+    def read_dataset_description(self) -> dict:
+        with open(self.outfile) as f:
+            return json.load(f)['Dataset description']
+
+    def test_quarantine(self):
+        self.volumes['membrane'] = self.volumes['membrane'].astype(object)
+        self.volumes.iloc[0, self.volumes.columns.get_loc('membrane')] = 'abc'
+        self.volumes.iloc[1, self.volumes.columns.get_loc('hemopericardium')] = -1.0
+        self.volumes.to_csv(self.volume_data)
+
+        with self.assertRaises(ValueError):
+            self.run_evaluation(self.argv)
+
+        output = self.run_evaluation(self.argv + ['--quarantine', '--labelfile', self.labelfile])
+
+        self.assertIn("Quarantined n=2 of n=157 rows", output)
+        description = self.read_dataset_description()
+        self.assertEqual(description['Number of positives'], 68)
+        self.assertEqual(description['Number of negatives'], 87)
+
+    def test_quarantine_ground_truth(self):
+        self.volumes.to_csv(self.volume_data)
+        self.volumes_gt.iloc[0, self.volumes_gt.columns.get_loc('membrane')] = -1.0
+        self.volumes_gt.to_csv(self.volume_data_gt)
+
+        output = self.run_evaluation(self.argv + ['--ground-truth-csv', self.volume_data_gt, '--quarantine'])
+
+        self.assertIn("Quarantined n=1 of n=157 rows", output)
+        self.assertIn("Dropped n=1 rows from the segmentation input and n=0 rows from the ground truth input", output)
+        self.assertEqual(self.read_dataset_description()['Number of positives'], 69)
+
+    def test_quarantine_removes_class(self):
+        self.volumes.to_csv(self.volume_data)
+        self.volumes_gt.loc[self.volumes_gt['is_AD'], 'membrane'] = -1.0
+        self.volumes_gt.to_csv(self.volume_data_gt)
+
+        with self.assertRaises(ValueError):
+            self.run_evaluation(self.argv + ['--ground-truth-csv', self.volume_data_gt, '--quarantine'])
+
+    def test_labelfile_columns(self):
+        self.volumes.drop(columns='hemopericardium').to_csv(self.volume_data)
+
+        self.run_evaluation(self.argv)
+        with self.assertRaises(ValueError):
+            self.run_evaluation(self.argv + ['--labelfile', self.labelfile])
+
+    def test_volume_ranges(self):
+        self.volumes.to_csv(self.volume_data)
+        with open(self.volume_ranges, 'w') as f:
+            json.dump({'false_lumen_ascending': [None, 200], 'carotid artery right': [0, 1000]}, f)
+
+        output = self.run_evaluation(self.argv + ['--volume-ranges', self.volume_ranges, '--quarantine'])
+
+        n_implausible = int((self.volumes['false_lumen_ascending'] > 200).sum())
+        self.assertIn(f"Quarantined n={n_implausible} of n=157 rows", output)
+        self.assertIn(f"'implausible_volume': {n_implausible}", output)
+
+    def test_invalid_volume_ranges(self):
+        self.volumes.to_csv(self.volume_data)
+        invalid_ranges = [{'membrane': ['a', 5]}, {'membrane': [True, 5]}, {'membrane': [10, 5]},
+                          {'membrane': [0]}, {'unknown structure': [0, 5]}]
+
+        for ranges in invalid_ranges:
+            with self.subTest(ranges=ranges):
+                with open(self.volume_ranges, 'w') as f:
+                    json.dump(ranges, f)
+
+                with self.assertRaisesRegex(ValueError, f"Volume ranges in file {self.volume_ranges}"):
+                    self.run_evaluation(self.argv + ['--volume-ranges', self.volume_ranges])
+
+    def test_negative_max_report_rows(self):
+        self.volumes.to_csv(self.volume_data)
+
+        with patch('sys.stderr', new_callable=io.StringIO), self.assertRaises(SystemExit):
+            self.run_evaluation(self.argv + ['--max-report-rows', '-1'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -12,6 +12,9 @@ import os
 import SimpleITK as sitk
 
 
+EVALUATION_COLUMNS = ('false_lumen_ascending', 'false_lumen_descending', 'membrane', 'is_AD')
+
+
 def valid_image_format(file: str):
     return file.endswith('.nii') or file.endswith('.nii.gz') or file.endswith('.nrrd') or file.endswith('.nhdr')
 
@@ -97,12 +100,120 @@ def segdata_check_both_classes(seg_data: pd.DataFrame):
                          f"Label value {missing_values} has not been provided.")
 
 
-def segdata_check_nan(seg_data: pd.DataFrame):
-    missing_values = seg_data.isna()
-    if missing_values.any().any():
-        missing_positions = missing_values.stack()
-        missing_positions = missing_positions[missing_positions]
-        raise ValueError(f"Error: Segmentation data contains NA values. Missing values at: {missing_positions}.")
+def segdata_check_nan(seg_data: pd.DataFrame, max_report_rows: int = 10):
+    if max_report_rows < 0:
+        raise ValueError(f"Number of reported rows must not be negative, got: {max_report_rows}.")
+
+    missing_values = seg_data.isna().to_numpy()
+    if missing_values.any():
+        rows, cols = np.nonzero(missing_values)
+        missing_positions = [(seg_data.index[row], seg_data.columns[col])
+                             for row, col in zip(rows[:max_report_rows], cols[:max_report_rows])]
+        raise ValueError(f"Error: Segmentation data contains NA values (n={len(rows)}). "
+                         f"Missing values at: {missing_positions}.")
+
+
+def validate_volume_table(seg_data: pd.DataFrame, label_dict: dict = None, volume_ranges: dict = None,
+                          max_report_rows: int = 10, quarantine: bool = False, check_basenames: bool = False):
+    """
+    Validates expected columns, dtypes, non-negative and plausible volumes (in mL) and unique cases. Case basenames
+    are only checked for uniqueness if check_basenames is set, i.e. when tables are matched by basename.
+    Offending rows raise a ValueError, or are dropped if quarantine is set. Returns the table, with non-numeric
+    volume columns converted to float, and a report.
+    """
+    if max_report_rows < 0:
+        raise ValueError(f"Number of reported rows must not be negative, got: {max_report_rows}.")
+
+    volume_columns = [column for column in seg_data.columns if column != 'is_AD']
+    expected = set(EVALUATION_COLUMNS)
+    if label_dict is not None:
+        expected |= set(label_dict.values())
+    missing_columns = expected - set(seg_data.columns)
+    unexpected_columns = set(volume_columns) - expected if label_dict is not None else set()
+    if missing_columns or unexpected_columns:
+        raise ValueError(f"Invalid columns in volume table. Missing expected columns: {missing_columns}. "
+                         f"Unexpected columns encountered: {unexpected_columns}.")
+
+    non_numeric = [column for column in volume_columns
+                   if not pd.api.types.is_numeric_dtype(seg_data[column].dtype)
+                   or pd.api.types.is_bool_dtype(seg_data[column].dtype)]
+    # Only text columns are parsed, all other non-numeric columns (e.g. boolean flags) are invalid as a whole.
+    coerced = {column: pd.to_numeric(seg_data[column], errors='coerce').to_numpy(dtype=np.float64)
+               for column in non_numeric
+               if pd.api.types.is_object_dtype(seg_data[column].dtype)
+               or pd.api.types.is_string_dtype(seg_data[column].dtype)}
+    volumes = np.full((len(seg_data), len(volume_columns)), np.nan, dtype=np.float64)
+    for i, column in enumerate(volume_columns):
+        if column in coerced:
+            volumes[:, i] = coerced[column]
+        elif column not in non_numeric:
+            volumes[:, i] = seg_data[column].to_numpy(dtype=np.float64)
+    raw_missing = seg_data[volume_columns].isna().to_numpy()
+    missing = np.isnan(volumes)
+
+    checks = {
+        'missing_values': raw_missing.any(axis=1),
+        'invalid_dtype': (missing & ~raw_missing).any(axis=1),
+        'non_finite_volume': (~np.isfinite(volumes) & ~missing).any(axis=1),
+        'negative_volume': (volumes < 0).any(axis=1),
+        'invalid_label': ~seg_data['is_AD'].isin([0, 1]).to_numpy(),
+    }
+
+    if volume_ranges:
+        out_of_range = np.zeros(len(seg_data), dtype=bool)
+        for column, (lower, upper) in volume_ranges.items():
+            if column not in volume_columns:
+                raise ValueError(f"Volume range given for unknown column: {column}.")
+            values = volumes[:, volume_columns.index(column)]
+            if lower is not None:
+                out_of_range |= values < lower
+            if upper is not None:
+                out_of_range |= values > upper
+        checks['implausible_volume'] = out_of_range
+
+    checks['duplicate_case'] = np.zeros(len(seg_data), dtype=bool) if seg_data.index.is_unique \
+        else seg_data.index.duplicated(keep=False)
+    if check_basenames:
+        checks['duplicate_basename'] = duplicated_basenames(seg_data.index)
+
+    offending = np.zeros(len(seg_data), dtype=bool)
+    for mask in checks.values():
+        offending |= mask
+    offending_positions = np.flatnonzero(offending)
+
+    report = {
+        'n_rows': len(seg_data),
+        'n_offending': len(offending_positions),
+        'non_numeric_columns': non_numeric,
+        'issues': {check: int(mask.sum()) for check, mask in checks.items() if mask.any()},
+        'offending_rows': {
+            str(seg_data.index[position]): [check for check, mask in checks.items() if mask[position]]
+            for position in offending_positions[:max_report_rows]
+        },
+        'quarantined': quarantine and bool(len(offending_positions)),
+    }
+
+    if len(offending_positions) and not quarantine:
+        raise ValueError(f"Volume table contains n={report['n_offending']} invalid rows "
+                         f"(of n={report['n_rows']}). Issues: {report['issues']}. "
+                         f"First offending rows: {report['offending_rows']}.")
+
+    if coerced:
+        seg_data = seg_data.assign(**coerced)
+    if len(offending_positions):
+        seg_data = seg_data[~offending].copy()
+    return seg_data, report
+
+
+def duplicated_basenames(index: pd.Index) -> np.ndarray:
+    paths = index.tolist()
+    if os.altsep:
+        paths = [path.replace(os.altsep, os.sep) for path in paths]
+    # Per-row Python loop, the most expensive part of the validation on large tables.
+    basenames = [path.rpartition(os.sep)[2] for path in paths]
+    if len(set(basenames)) == len(basenames):
+        return np.zeros(len(basenames), dtype=bool)
+    return pd.Index(basenames).duplicated(keep=False)
 
 
 def write_results(result: dict, filename: str):